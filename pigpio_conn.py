@@ -0,0 +1,79 @@
+"""Shared pigpio daemon connection for SmartLock.
+
+サーボ(gpiozero の PiGPIOFactory 経由)とリードスイッチの両方が pigpiod に接続するため、
+接続を1本にまとめて参照カウントで管理する。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Optional
+
+try:
+    import pigpio  # pyright: ignore[reportMissingImports]
+except Exception:  # pragma: no cover - runtime dependency
+    pigpio = None
+
+_lock = threading.Lock()
+_pi: Optional[Any] = None
+_owned = False
+_refs = 0
+
+
+def _factory_connection() -> Optional[Any]:
+    """gpiozero が PiGPIOFactory を使っていれば、その接続を返す。"""
+    try:
+        from gpiozero import Device  # pyright: ignore[reportMissingImports]
+        from gpiozero.pins.pigpio import PiGPIOFactory  # pyright: ignore[reportMissingImports]
+    except Exception:
+        return None
+    factory = getattr(Device, "pin_factory", None)
+    if isinstance(factory, PiGPIOFactory):
+        return factory.connection
+    return None
+
+
+def get_pi() -> Optional[Any]:
+    """接続済みの pigpio.pi を返す。接続できなければ None。
+
+    取得に成功したら、使い終わったときに release_pi() を1回呼ぶこと。
+    """
+    global _pi, _owned, _refs
+    if pigpio is None:
+        return None
+    with _lock:
+        if _pi is None:
+            pi = _factory_connection()
+            owned = pi is None
+            if owned:
+                pi = pigpio.pi()  # type: ignore[attr-defined]
+            if not getattr(pi, "connected", False):
+                if owned:
+                    try:
+                        pi.stop()
+                    except Exception:
+                        pass
+                return None
+            _pi, _owned = pi, owned
+        _refs += 1
+        return _pi
+
+
+def release_pi() -> None:
+    """get_pi() の参照を1つ返す。最後の参照で自前の接続なら切断する。"""
+    global _pi, _owned, _refs
+    with _lock:
+        if _refs == 0:
+            return
+        _refs -= 1
+        if _refs > 0 or _pi is None:
+            return
+        if _owned:
+            try:
+                _pi.stop()
+            except Exception:
+                logging.exception("Failed to stop pigpio")
+        # PiGPIOFactory の接続は gpiozero 側が閉じる
+        _pi = None
+        _owned = False
@@ -8,9 +8,14 @@ Two reed switches are assumed:
 
 from __future__ import annotations
 
+import functools
 import logging
 import os
-from typing import Any, Optional
+import select
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 try:
     import pigpio  # pyright: ignore[reportMissingImports]
@@ -18,16 +23,125 @@ except Exception:  # pragma: no cover - runtime dependency
     pigpio = None
 
 try:
-    from gpiozero import DigitalInputDevice  # pyright: ignore[reportMissingImports]
+    import gpiod  # pyright: ignore[reportMissingImports]
+    from gpiod.line import Bias, Direction, Edge, Value  # pyright: ignore[reportMissingImports]
+except Exception:  # pragma: no cover - runtime dependency (libgpiod v2)
+    gpiod = None
+
+try:
+    from gpiozero import Device, DigitalInputDevice  # pyright: ignore[reportMissingImports]
 except Exception:  # pragma: no cover - runtime dependency
+    Device = None
     DigitalInputDevice = None
 
+try:
+    from .pigpio_conn import get_pi, release_pi
+except ImportError:  # pragma: no cover - direct script execution
+    from pigpio_conn import get_pi, release_pi  # type: ignore
+
+try:
+    from .smartlock_env import env as _env, env_bool as _env_bool
+except ImportError:  # pragma: no cover - direct script execution
+    from smartlock_env import env as _env, env_bool as _env_bool  # type: ignore
+
+_SYSFS_GPIO = "/sys/class/gpio"
+_GPIOCHIP = _env("SMARTLOCK_GPIOCHIP") or "/dev/gpiochip0"
+
+
+def _ttl_cache(ms: float) -> Callable[[Callable[[Any], Any]], Callable[[Any], Any]]:
+    """引数なしメソッドの戻り値を、インスタンス毎に ms ミリ秒だけ再利用する。"""
+    ttl_ns = int(ms * 1_000_000)
+
+    def decorator(fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        attr = f"_ttl_{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(self: Any) -> Any:
+            now = time.monotonic_ns()
+            cached = self.__dict__.get(attr)
+            if cached is not None and now < cached[0]:
+                return cached[1]
+            value = fn(self)
+            # (期限, 値) を1回の代入で差し替えるのでロック不要
+            self.__dict__[attr] = (now + ttl_ns, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def _read_fd(fd: int) -> int:
+    """sysfs の value ファイル(fd)から物理レベル(0/1)を読む。"""
+    os.lseek(fd, 0, os.SEEK_SET)
+    return os.read(fd, 1)[0] - 0x30  # b"0" / b"1"
+
+
+def _select_pin_factory() -> None:
+    """gpiozeroのピンファクトリ未決定なら、lgpio(カーネルのエッジ通知)を優先する。
+
+    native等の入力毎にポーリングスレッドを立てるファクトリを避けるため。
+    GPIOZERO_PIN_FACTORY 指定時や、既に(サーボ側で)決まっている場合は何もしない。
+    """
+    if Device is None or os.getenv("GPIOZERO_PIN_FACTORY"):
+        return
+    if getattr(Device, "pin_factory", None) is not None:
+        return
+    try:
+        from gpiozero.pins.lgpio import LGPIOFactory  # pyright: ignore[reportMissingImports]
 
-def _env_bool(name: str, default: bool) -> bool:
-    raw = os.getenv(name)
-    if raw is None:
-        return default
-    return raw.strip().lower() in {"1", "true", "yes", "on"}
+        Device.pin_factory = LGPIOFactory()
+    except Exception:
+        logging.debug("LGPIOFactory is unavailable; using gpiozero default", exc_info=True)
+
+
+class _SysfsPin:
+    """エクスポート済みの sysfs GPIO を開きっぱなしにして読む軽量リーダー。
+
+    pull-up/down は sysfs から設定できないため、外部で設定済みである前提。
+    """
+
+    def __init__(self, pin: int) -> None:
+        self.pin = int(pin)
+        self.fd = os.open(f"{_SYSFS_GPIO}/gpio{self.pin}/value", os.O_RDONLY)
+
+    @staticmethod
+    def exported(pin: int) -> bool:
+        return os.path.exists(f"{_SYSFS_GPIO}/gpio{int(pin)}/value")
+
+    def read(self) -> int:
+        """物理レベル(0/1)を返す。"""
+        return _read_fd(self.fd)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class SWARDebouncer:
+    """各ピンの直近Nサンプルを整数のシフトレジスタに詰めて安定判定する。
+
+    レジスタが全0/全1になったときだけ安定値を更新する（N=1なら素通し）。
+    """
+
+    def __init__(self, widths: Dict[int, int]) -> None:
+        self.masks = {pin: (1 << max(1, min(64, int(w)))) - 1 for pin, w in widths.items()}
+        self.regs = {pin: 0 for pin in widths}
+        self.stable = {pin: 0 for pin in widths}
+
+    def seed(self, pin: int, bit: int) -> None:
+        self.regs[pin] = self.masks[pin] if bit else 0
+        self.stable[pin] = bit
+
+    def sample(self, pin: int, bit: int) -> int:
+        """サンプルを1つ取り込み、現在の安定レベルを返す。"""
+        mask = self.masks[pin]
+        reg = ((self.regs[pin] << 1) | bit) & mask
+        self.regs[pin] = reg
+        if reg == 0:
+            self.stable[pin] = 0
+        elif reg == mask:
+            self.stable[pin] = 1
+        return self.stable[pin]
 
 
 class ReedSwitchConfig:
@@ -37,11 +151,14 @@ class ReedSwitchConfig:
         pull_up: bool = True,
         active_low: bool = True,
         bounce_time: float = 0.05,
+        debounce_samples: int = 1,
     ) -> None:
         self.pin = int(pin)
         self.pull_up = bool(pull_up)
         self.active_low = bool(active_low)
         self.bounce_time = float(bounce_time)
+        # sysfs直読み時のソフトウェアデバウンス（連続一致が必要なサンプル数, 1で無効）
+        self.debounce_samples = max(1, min(64, int(debounce_samples)))
 
 
 class ReedSwitchMonitor:
@@ -54,17 +171,39 @@ class ReedSwitchMonitor:
     ) -> None:
         self._lock_cfg = lock_switch
         self._door_cfg = door_switch
-        self.dry_run = dry_run or (DigitalInputDevice is None and pigpio is None)
+        # バックエンドが実際に使えるかは initialize() で試してから決める（使えなければdry-runへ）
+        self.dry_run = dry_run
 
         self._lock_dev: Optional[Any] = None
         self._door_dev: Optional[Any] = None
+        self._lock_sysfs: Optional[_SysfsPin] = None
+        self._door_sysfs: Optional[_SysfsPin] = None
+        self._lock_fd: Optional[int] = None
+        self._door_fd: Optional[int] = None
+        self._debouncer: Optional[SWARDebouncer] = None
+        # 読み取り時の分岐を減らすため initialize() でバックエンド毎のリーダーを確定させる
+        self._lock_reader: Optional[Callable[[], bool]] = None
+        self._door_reader: Optional[Callable[[], bool]] = None
+        self._lock_enabled = False
+        self._door_enabled = False
         self._pi: Optional[Any] = None
+        # エッジ駆動(pigpio/gpiod)時の最新レベル。2ピンだけなのでdictではなく個別の属性に持つ
+        self._lock_pin = -1 if lock_switch is None else lock_switch.pin
+        self._door_pin = -1 if door_switch is None else door_switch.pin
+        self._lock_level: Optional[int] = None
+        self._door_level: Optional[int] = None
+        # エッジ通知(別スレッド)と初期値の書き込みを前後させないためのロック（読み取り側は不要）
+        self._level_lock = threading.Lock()
+        self._cbs: List[Any] = []
+        self._line_req: Optional[Any] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_fds: Optional[Tuple[int, int]] = None
         self._initialized = False
 
     @staticmethod
     def from_env(*, dry_run: bool = False) -> "ReedSwitchMonitor":
         def _env_int_optional(name: str) -> Optional[int]:
-            raw = os.getenv(name)
+            raw = _env(name)
             if raw is None or raw.strip() == "":
                 return None
             try:
@@ -92,7 +231,8 @@ class ReedSwitchMonitor:
 
         期待する構造:
         {
-          "lock": {"pin": 23, "pull_up": true, "active_low": true, "bounce_time": 0.05},
+          "lock": {"pin": 23, "pull_up": true, "active_low": true, "bounce_time": 0.05,
+                   "debounce_samples": 1},
           "door": {"pin": 24, ...}
         }
         """
@@ -112,7 +252,8 @@ class ReedSwitchMonitor:
             pull_up = bool(cfg.get("pull_up", True))
             active_low = bool(cfg.get("active_low", True))
             bounce_time = float(cfg.get("bounce_time", 0.05))
-            return ReedSwitchConfig(pin_i, pull_up, active_low, bounce_time)
+            debounce_samples = int(cfg.get("debounce_samples", 1))
+            return ReedSwitchConfig(pin_i, pull_up, active_low, bounce_time, debounce_samples)
 
         lock_cfg = _mk(config.get("lock"))
         door_cfg = _mk(config.get("door"))
@@ -129,13 +270,9 @@ class ReedSwitchMonitor:
 
         # pigpioが使えるなら優先（glitch filter/コールバック等が強い）
         if pigpio is not None:
-            pi = pigpio.pi()  # type: ignore[attr-defined]
-            if not getattr(pi, "connected", False):
-                try:
-                    pi.stop()
-                except Exception:
-                    pass
-            else:
+            # サーボ(PiGPIOFactory)と同じpigpiod接続を共有する
+            pi = get_pi()
+            if pi is not None:
                 self._pi = pi
                 for cfg in (self._lock_cfg, self._door_cfg):
                     if cfg is None:
@@ -150,25 +287,79 @@ class ReedSwitchMonitor:
                     glitch_us = int(max(0.0, cfg.bounce_time) * 1_000_000)
                     pi.set_glitch_filter(cfg.pin, glitch_us)
 
-        # pigpioが無理ならgpiozeroでフォールバック
-        if self._pi is None:
-            if DigitalInputDevice is None:
-                raise RuntimeError("pigpio または gpiozero が必要です")
+                # 読み取りの度にpigpiodへ問い合わせないよう、エッジ通知で最新レベルをキャッシュする
+                cfgs = [cfg for cfg in (self._lock_cfg, self._door_cfg) if cfg is not None]
+                # 先にコールバックを登録してから初期値を読む（間に来たエッジを取りこぼさない）
+                self._cbs = [
+                    pi.callback(cfg.pin, pigpio.EITHER_EDGE, self._on_edge)  # type: ignore[attr-defined]
+                    for cfg in cfgs
+                ]
+                # 初期値はbank 1(GPIO 0-31)を1回のRPCでまとめて読む。
+                # 読んだ後に届いたエッジの方が新しいので、コールバックが既に書いたピンは上書きしない
+                bank = int(pi.read_bank_1())
+                for cfg in cfgs:
+                    level = (bank >> cfg.pin) & 1 if cfg.pin < 32 else int(pi.read(cfg.pin))
+                    self._seed_level(cfg.pin, level)
+
+        # pigpiodが無ければgpiochipキャラクタデバイスのエッジイベントを使う
+        if self._pi is None and gpiod is not None:
+            try:
+                self._init_gpiod()
+            except Exception:
+                logging.warning("gpiod で %s を取得できませんでした", _GPIOCHIP, exc_info=True)
+
+        event_driven = self._pi is not None or self._line_req is not None
 
+        # pigpioもgpiozeroも無ければ、エクスポート済みのsysfs GPIOを直接読む
+        if not event_driven and DigitalInputDevice is None:
+            cfgs = [cfg for cfg in (self._lock_cfg, self._door_cfg) if cfg is not None]
+            if not all(_SysfsPin.exported(cfg.pin) for cfg in cfgs):
+                self._fall_back_to_dry_run("pigpiod/gpiod/gpiozero が使えず、sysfs GPIO もエクスポートされていません")
+                return
             if self._lock_cfg is not None:
-                self._lock_dev = DigitalInputDevice(
-                    self._lock_cfg.pin,
-                    pull_up=self._lock_cfg.pull_up,
-                    active_state=(not self._lock_cfg.active_low),
-                    bounce_time=self._lock_cfg.bounce_time,
-                )
+                self._lock_sysfs = _SysfsPin(self._lock_cfg.pin)
+                self._lock_fd = self._lock_sysfs.fd
             if self._door_cfg is not None:
-                self._door_dev = DigitalInputDevice(
-                    self._door_cfg.pin,
-                    pull_up=self._door_cfg.pull_up,
-                    active_state=(not self._door_cfg.active_low),
-                    bounce_time=self._door_cfg.bounce_time,
-                )
+                self._door_sysfs = _SysfsPin(self._door_cfg.pin)
+                self._door_fd = self._door_sysfs.fd
+            # sysfsにはglitch filterが無いので、読み取り毎にサンプルとして積分する
+            self._debouncer = SWARDebouncer({cfg.pin: cfg.debounce_samples for cfg in cfgs})
+            for sysfs_pin in (self._lock_sysfs, self._door_sysfs):
+                if sysfs_pin is not None:
+                    self._debouncer.seed(sysfs_pin.pin, sysfs_pin.read())
+
+        # pigpio/gpiodが無理ならgpiozeroでフォールバック
+        elif not event_driven:
+            _select_pin_factory()
+            try:
+                if self._lock_cfg is not None:
+                    self._lock_dev = DigitalInputDevice(
+                        self._lock_cfg.pin,
+                        pull_up=self._lock_cfg.pull_up,
+                        active_state=(not self._lock_cfg.active_low),
+                        bounce_time=self._lock_cfg.bounce_time,
+                    )
+                    # 属性探索を毎回しないよう、読み取りをクロージャに束縛しておく
+                    self._lock_reader = lambda d=self._lock_dev: bool(d.is_active)
+                if self._door_cfg is not None:
+                    self._door_dev = DigitalInputDevice(
+                        self._door_cfg.pin,
+                        pull_up=self._door_cfg.pull_up,
+                        active_state=(not self._door_cfg.active_low),
+                        bounce_time=self._door_cfg.bounce_time,
+                    )
+                    self._door_reader = lambda d=self._door_dev: bool(d.is_active)
+            except Exception:
+                logging.debug("gpiozero DigitalInputDevice の生成に失敗", exc_info=True)
+                self._fall_back_to_dry_run("gpiozero でリードスイッチのピンを取得できませんでした")
+                return
+
+        if self._lock_reader is None and self._lock_cfg is not None:
+            self._lock_reader = self._make_level_reader(self._lock_cfg, self._lock_fd, event_driven)
+        if self._door_reader is None and self._door_cfg is not None:
+            self._door_reader = self._make_level_reader(self._door_cfg, self._door_fd, event_driven)
+        self._lock_enabled = self._lock_reader is not None
+        self._door_enabled = self._door_reader is not None
 
         self._initialized = True
         logging.info(
@@ -177,14 +368,117 @@ class ReedSwitchMonitor:
             None if self._door_cfg is None else f"GPIO {self._door_cfg.pin}",
         )
 
+    def _fall_back_to_dry_run(self, reason: str) -> None:
+        """使えるバックエンドが無いとき、起動は続けてリードスイッチだけ無効にする。"""
+        logging.warning("%s; reed switches are disabled (dry-run)", reason)
+        # 途中まで確保した資源を解放する（cleanup() は初期化済みのときだけ動く）
+        self._initialized = True
+        self.cleanup()
+        self.dry_run = True
+        self._initialized = True
+
+    def _make_level_reader(
+        self, cfg: ReedSwitchConfig, fd: Optional[int], event_driven: bool
+    ) -> Optional[Callable[[], bool]]:
+        """物理レベルを読むバックエンド(sysfs/pigpio/gpiod)用に、ON判定済みのリーダーを作る。"""
+        pin = cfg.pin
+        on_level = 0 if cfg.active_low else 1
+        if fd is not None:
+            debouncer = self._debouncer
+            return lambda: debouncer.sample(pin, _read_fd(fd)) == on_level  # type: ignore[union-attr]
+        if event_driven:
+            if pin == self._lock_pin:
+                return lambda: self._lock_level == on_level
+            return lambda: self._door_level == on_level
+        return None
+
+    def _init_gpiod(self) -> None:
+        cfgs = [cfg for cfg in (self._lock_cfg, self._door_cfg) if cfg is not None]
+        if not cfgs:
+            return
+        config = {
+            cfg.pin: gpiod.LineSettings(  # type: ignore[union-attr]
+                direction=Direction.INPUT,
+                edge_detection=Edge.BOTH,
+                bias=Bias.PULL_UP if cfg.pull_up else Bias.PULL_DOWN,
+                # チャタリング除去はカーネル側で行う
+                debounce_period=timedelta(seconds=max(0.0, cfg.bounce_time)),
+            )
+            for cfg in cfgs
+        }
+        req = gpiod.request_lines(_GPIOCHIP, consumer="smartlock", config=config)  # type: ignore[union-attr]
+        for cfg in cfgs:
+            self._on_edge(cfg.pin, 1 if req.get_value(cfg.pin) == Value.ACTIVE else 0, 0)
+        self._line_req = req
+        self._stop_fds = os.pipe()
+        self._watcher = threading.Thread(target=self._watch_edges, name="smartlock-reed-edges", daemon=True)
+        self._watcher.start()
+
+    def _watch_edges(self) -> None:
+        """gpiochipのイベントfdをepollで待ち、エッジ毎に最新レベルを更新する。"""
+        req = self._line_req
+        stop_r = self._stop_fds[0]  # type: ignore[index]
+        ep = select.epoll()
+        try:
+            ep.register(req.fd, select.EPOLLIN)  # type: ignore[union-attr]
+            ep.register(stop_r, select.EPOLLIN)
+            while True:
+                for fd, _mask in ep.poll():
+                    if fd == stop_r:
+                        return
+                    for event in req.read_edge_events():  # type: ignore[union-attr]
+                        rising = event.event_type == event.Type.RISING_EDGE
+                        self._on_edge(event.line_offset, 1 if rising else 0, event.timestamp_ns)
+        except Exception:
+            logging.exception("リードスイッチのエッジ監視が停止しました")
+        finally:
+            ep.close()
+
+    def _on_edge(self, gpio: int, level: int, tick: int) -> None:
+        # level=2 はウォッチドッグのタイムアウト通知なのでレベルとしては扱わない
+        if level > 1:
+            return
+        with self._level_lock:
+            if gpio == self._lock_pin:
+                self._lock_level = level
+            elif gpio == self._door_pin:
+                self._door_level = level
+
+    def _seed_level(self, gpio: int, level: int) -> None:
+        """初期値を書く。コールバックが先に書いていれば（より新しいので）何もしない。"""
+        with self._level_lock:
+            if gpio == self._lock_pin and self._lock_level is None:
+                self._lock_level = level
+            elif gpio == self._door_pin and self._door_level is None:
+                self._door_level = level
+
     def cleanup(self) -> None:
         if not self._initialized:
             return
-        if self._pi is not None:
+        for cb in self._cbs:
             try:
-                self._pi.stop()
+                cb.cancel()
             except Exception:
-                logging.exception("Failed to stop pigpio")
+                logging.exception("Failed to cancel pigpio callback")
+        self._cbs = []
+        if self._stop_fds is not None:
+            os.write(self._stop_fds[1], b"x")
+            if self._watcher is not None:
+                self._watcher.join(timeout=1.0)
+            for fd in self._stop_fds:
+                os.close(fd)
+        self._watcher = None
+        self._stop_fds = None
+        if self._line_req is not None:
+            try:
+                self._line_req.release()
+            except Exception:
+                logging.exception("Failed to release gpiod line request")
+            self._line_req = None
+        self._lock_level = None
+        self._door_level = None
+        if self._pi is not None:
+            release_pi()
             self._pi = None
         for dev in (self._lock_dev, self._door_dev):
             if dev is None:
@@ -194,46 +488,60 @@ class ReedSwitchMonitor:
                     getattr(dev, "close")()
             except Exception:
                 logging.exception("Failed to close reed switch device")
+        for pin in (self._lock_sysfs, self._door_sysfs):
+            if pin is None:
+                continue
+            try:
+                pin.close()
+            except Exception:
+                logging.exception("Failed to close sysfs GPIO value file")
         self._lock_dev = None
         self._door_dev = None
+        self._lock_reader = None
+        self._door_reader = None
+        self._lock_sysfs = None
+        self._door_sysfs = None
+        self._lock_fd = None
+        self._door_fd = None
+        self._debouncer = None
+        self._lock_enabled = False
+        self._door_enabled = False
+        self.__dict__.pop("_ttl_snapshot", None)
         self._initialized = False
 
     def lock_switch_on(self) -> Optional[bool]:
         """True when switch is ON, False when OFF, None when unavailable."""
-        if self.dry_run or self._lock_cfg is None:
-            return None
-
-        if self._pi is not None:
-            try:
-                level = int(self._pi.read(self._lock_cfg.pin))
-                return (level == 0) if self._lock_cfg.active_low else (level == 1)
-            except Exception:
-                return None
-
-        if self._lock_dev is None:
+        if not self._lock_enabled:
             return None
-        return bool(getattr(self._lock_dev, "is_active"))
+        return self._lock_reader()  # type: ignore[misc]
 
     def door_switch_on(self) -> Optional[bool]:
         """True when switch is ON, False when OFF, None when unavailable."""
-        if self.dry_run or self._door_cfg is None:
+        if not self._door_enabled:
             return None
+        return self._door_reader()  # type: ignore[misc]
 
-        if self._pi is not None:
-            try:
-                level = int(self._pi.read(self._door_cfg.pin))
-                return (level == 0) if self._door_cfg.active_low else (level == 1)
-            except Exception:
-                return None
+    def door_switch_on_now(self) -> Optional[bool]:
+        """door_switch_on() の即時版（安全判定用）。
 
-        if self._door_dev is None:
+        sysfs直読み時はデバウンサーを通さずにその場の1サンプルで判定する
+        （ポーリングスレッドと共有しているシフトレジスタを別スレッドから進めないため）。
+        """
+        if not self._door_enabled:
             return None
-        return bool(getattr(self._door_dev, "is_active"))
+        if self._door_fd is not None:
+            return _read_fd(self._door_fd) == (0 if self._door_cfg.active_low else 1)  # type: ignore[union-attr]
+        return self._door_reader()  # type: ignore[misc]
+
+    @_ttl_cache(ms=10)
+    def snapshot(self) -> Tuple[Optional[bool], Optional[bool]]:
+        """(lock_switch_on, door_switch_on) をまとめて返す（10msだけキャッシュ）。"""
+        return self.lock_switch_on(), self.door_switch_on()
 
     def is_locked(self) -> Optional[bool]:
         """ON => locked, OFF => unlocked."""
-        return self.lock_switch_on()
+        return self.snapshot()[0]
 
     def is_door_closed(self) -> Optional[bool]:
         """ON => closed, OFF => open."""
-        return self.door_switch_on()
+        return self.snapshot()[1]
@@ -11,12 +11,27 @@ MG996R のような標準サーボ向けの実装。
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import queue
 import threading
 import time
-from dataclasses import dataclass
-from typing import Optional
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Callable, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# 動作中のdebugログは引数のタプル化も省けるようフラグで囲む
+_DEBUG = False
+
+
+def _refresh_debug() -> None:
+    """ログレベル変更後に呼ぶと _DEBUG を再評価する（initialize() でも呼ばれる）"""
+    global _DEBUG
+    _DEBUG = log.isEnabledFor(logging.DEBUG)
+
 
 _USE_PIGPIO = os.environ.get("GPIOZERO_PIN_FACTORY", "").lower() == "pigpio"
 
@@ -35,6 +50,15 @@ except Exception:
     ServoClass = None
 
 
+def _noop() -> None:
+    pass
+
+
+def _dry_run_set_angle(angle: float) -> None:
+    if _DEBUG:
+        log.debug("Dry-run: set angle=%.1f", angle)
+
+
 class _MockServo:
     """テスト/ドライラン用モック"""
     def __init__(self) -> None:
@@ -45,23 +69,95 @@ class _MockServo:
         pass
 
 
-@dataclass(frozen=True)
+def _precise_sleep(duration: float) -> None:
+    """time.sleep のジッタ(~1ms)を避けるため、最後の2msだけビジーウェイトする"""
+    end = time.monotonic_ns() + int(duration * 1e9)
+    time.sleep(max(0.0, duration - 0.002))
+    while time.monotonic_ns() < end:
+        pass
+
+
 class ServoConfig:
     """
-    MG996R などの標準サーボ用設定
+    MG996R などの標準サーボ用設定（生成後は変更不可）
     """
-    pin: int = 12
-    min_pulse_width: float = 0.0005
-    max_pulse_width: float = 0.0025
 
-    # 角度設定 (degrees)
-    neutral_angle: float = 0.0   # 待機位置（手動操作を邪魔しない位置）
-    lock_angle: float = 90.0     # 施錠方向に回す角度
-    unlock_angle: float = -90.0  # 開錠方向に回す角度
+    # 公開フィールド（__init__ の引数順。比較/ハッシュ/repr/pickle はこれだけを使う）
+    _FIELDS = (
+        "pin",
+        "min_pulse_width",
+        "max_pulse_width",
+        "neutral_angle",
+        "lock_angle",
+        "unlock_angle",
+        "move_time",
+        "hold_time",
+        "precise_timing",
+    )
+    __slots__ = _FIELDS + ("_total_wait",)
+
+    pin: int
+    min_pulse_width: float
+    max_pulse_width: float
+    neutral_angle: float
+    lock_angle: float
+    unlock_angle: float
+    move_time: float
+    hold_time: float
+    precise_timing: bool
+    _total_wait: float
+
+    def __init__(
+        self,
+        pin: int = 12,
+        min_pulse_width: float = 0.0005,
+        max_pulse_width: float = 0.0025,
+        # 角度設定 (degrees)
+        neutral_angle: float = 0.0,   # 待機位置（手動操作を邪魔しない位置）
+        lock_angle: float = 90.0,     # 施錠方向に回す角度
+        unlock_angle: float = -90.0,  # 開錠方向に回す角度
+        # 動作設定
+        move_time: float = 0.5,       # 回転にかかる時間の目安
+        hold_time: float = 0.5,       # 回転しきった状態で保持する時間（秒）
+        precise_timing: bool = False, # 待ち時間の最後の2msをビジーループで詰める
+    ) -> None:
+        _set = object.__setattr__
+        _set(self, "pin", pin)
+        _set(self, "min_pulse_width", min_pulse_width)
+        _set(self, "max_pulse_width", max_pulse_width)
+        _set(self, "neutral_angle", neutral_angle)
+        _set(self, "lock_angle", lock_angle)
+        _set(self, "unlock_angle", unlock_angle)
+        _set(self, "move_time", move_time)
+        _set(self, "hold_time", hold_time)
+        _set(self, "precise_timing", precise_timing)
+        # 往路の移動+保持の待ち時間は毎回足さずに済むよう先に計算しておく
+        _set(self, "_total_wait", move_time + hold_time)
+
+    def _fields(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self._FIELDS)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"ServoConfig is frozen (cannot set {name!r})")
 
-    # 動作設定
-    move_time: float = 0.5       # 回転にかかる時間の目安
-    hold_time: float = 0.5       # 回転しきった状態で保持する時間（秒）
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"ServoConfig is frozen (cannot delete {name!r})")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # __setattr__ を禁止しているため、copy/pickle は __init__ 経由で作り直させる
+        return (ServoConfig, self._fields())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ServoConfig):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        return hash(self._fields())
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._FIELDS)
+        return f"ServoConfig({args})"
 
 
 class ServoController:
@@ -70,17 +166,29 @@ class ServoController:
     def __init__(self, config: ServoConfig, dry_run: bool = False) -> None:
         self.config = config
         self.dry_run = dry_run or ServoClass is None
+        self._sleep = _precise_sleep if config.precise_timing else time.sleep
         self._lock = threading.Lock()
         self._servo: Optional[object] = None
+        # サーボ操作は initialize() で束縛し、呼び出し毎の hasattr/setattr 探索を省く
+        self._set_angle_fn: Optional[Callable[[float], None]] = None
+        self._detach_fn: Callable[[], None] = _noop
+        self._close_fn: Callable[[], None] = _noop
+        # 動作要求は1本のワーカースレッドで順番に処理する
+        self._q: "queue.Queue[Optional[Tuple[float, str, Future]]]" = queue.Queue(maxsize=8)
+        self._worker: Optional[threading.Thread] = None
+        # cleanup() 開始後は新しい要求を受け付けない（番兵の後ろに積まれて完了しない要求を作らない）
+        self._submit_lock = threading.Lock()
+        self._closing = False
         self._initialized = False
 
     def initialize(self) -> None:
         """サーボデバイスをセットアップ"""
         if self._initialized:
             return
+        _refresh_debug()
 
         if self.dry_run:
-            logging.warning("Dry-run mode: サーボ出力は無効です")
+            log.warning("Dry-run mode: サーボ出力は無効です")
             self._servo = _MockServo()  # type: ignore
         else:
             if ServoClass is None:
@@ -102,55 +210,139 @@ class ServoController:
             except Exception as exc:
                 raise RuntimeError(f"サーボ初期化失敗 (GPIO {self.config.pin})") from exc
 
+        if self.dry_run:
+            self._set_angle_fn = _dry_run_set_angle
+        else:
+            self._set_angle_fn = partial(setattr, self._servo, "angle")
+            self._detach_fn = getattr(self._servo, "detach", _noop)
+        self._close_fn = getattr(self._servo, "close", _noop)
+
+        self._worker = threading.Thread(target=self._run_worker, name="smartlock-servo", daemon=True)
+        self._worker.start()
+
         self._initialized = True
         pin_factory = os.environ.get("GPIOZERO_PIN_FACTORY", "rpigpio")
-        logging.info("サーボ初期化完了: GPIO %d, pin_factory=%s", self.config.pin, pin_factory)
+        log.info("サーボ初期化完了: GPIO %d, pin_factory=%s", self.config.pin, pin_factory)
 
     def cleanup(self) -> None:
         """リソースを解放"""
         if not self._initialized:
             return
+        # 受付を止めてから未処理の要求を破棄し、ワーカーを止める
+        with self._submit_lock:
+            self._closing = True
+        while True:
+            try:
+                item = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[2].cancel()
+        if self._worker is not None:
+            # 受付停止後に空にしたので満杯にはならない
+            self._q.put_nowait(None)
+            self._worker.join()
+            self._worker = None
         with self._lock:
             if self._servo:
                 try:
                     self._detach() # 安全のため脱力
-                    if hasattr(self._servo, 'close'):
-                        self._servo.close()
+                    self._close_fn()
                 except Exception:
-                    logging.exception("cleanup中に例外")
+                    log.exception("cleanup中に例外")
         self._servo = None
+        self._set_angle_fn = None
+        self._detach_fn = _noop
+        self._close_fn = _noop
         self._initialized = False
-        logging.info("サーボをクリーンアップしました")
+        with self._submit_lock:
+            self._closing = False
+        log.info("サーボをクリーンアップしました")
 
     def lock(self) -> str:
         """施錠アクション: Neutral -> Lock -> (Wait) -> Neutral -> Detach"""
-        logging.info("施錠動作開始: ターゲット %.1f deg", self.config.lock_angle)
-        self._perform_action(self.config.lock_angle)
-        return "locked"
+        return self.wait(self.submit_lock())
 
     def unlock(self) -> str:
         """開錠アクション: Neutral -> Unlock -> (Wait) -> Neutral -> Detach"""
-        logging.info("開錠動作開始: ターゲット %.1f deg", self.config.unlock_angle)
-        self._perform_action(self.config.unlock_angle)
-        return "unlocked"
+        return self.wait(self.submit_unlock())
+
+    def submit_lock(self) -> Future:
+        """施錠をワーカーに依頼し、完了時に "locked" となる Future を返す"""
+        log.info("施錠動作開始: ターゲット %.1f deg", self.config.lock_angle)
+        return self._submit(self.config.lock_angle, "locked")
+
+    def submit_unlock(self) -> Future:
+        """開錠をワーカーに依頼し、完了時に "unlocked" となる Future を返す"""
+        log.info("開錠動作開始: ターゲット %.1f deg", self.config.unlock_angle)
+        return self._submit(self.config.unlock_angle, "unlocked")
+
+    @staticmethod
+    def wait(future: Future, timeout: Optional[float] = None) -> str:
+        """submit_lock()/submit_unlock() の完了を待って結果を返す"""
+        return future.result(timeout)
+
+    def _submit(self, target_angle: float, result: str) -> Future:
+        future: Future = Future()
+        with self._submit_lock:
+            if self._closing:
+                raise RuntimeError("サーボを終了処理中です")
+            if self._worker is not None:
+                try:
+                    self._q.put_nowait((target_angle, result, future))
+                except queue.Full:
+                    raise RuntimeError("サーボへの動作要求が多すぎます") from None
+                return future
+        if not self.dry_run:
+            raise RuntimeError("サーボが初期化されていません")
+        # 未初期化のdry-run（テスト用）はワーカー無しでその場で模擬動作する
+        future.set_running_or_notify_cancel()
+        self._perform_action(target_angle)
+        future.set_result(result)
+        return future
+
+    def _run_worker(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            target_angle, result, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._perform_action(target_angle)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+    async def lock_async(self) -> str:
+        """lock() のコルーチン版。ワーカーの完了をイベントループ上で待つ。"""
+        return await asyncio.wrap_future(self.submit_lock())
+
+    async def unlock_async(self) -> str:
+        """unlock() のコルーチン版。ワーカーの完了をイベントループ上で待つ。"""
+        return await asyncio.wrap_future(self.submit_unlock())
 
     def _perform_action(self, target_angle: float) -> None:
         """往復動作の実行ロジック"""
         with self._lock:
             try:
                 # 1. ターゲットへ移動
-                logging.debug("移動: %.1f -> %.1f", self.config.neutral_angle, target_angle)
+                if _DEBUG:
+                    log.debug("移動: %.1f -> %.1f", self.config.neutral_angle, target_angle)
                 self._set_angle(target_angle)
                 
                 # 移動完了待ち + 保持時間
-                time.sleep(self.config.move_time + self.config.hold_time)
+                self._sleep(self.config._total_wait)
 
                 # 2. 中立位置へ戻る
-                logging.debug("復帰: %.1f -> %.1f", target_angle, self.config.neutral_angle)
+                if _DEBUG:
+                    log.debug("復帰: %.1f -> %.1f", target_angle, self.config.neutral_angle)
                 self._set_angle(self.config.neutral_angle)
                 
                 # 戻り移動完了待ち
-                time.sleep(self.config.move_time)
+                self._sleep(self.config.move_time)
 
             finally:
                 # 3. 最後に必ず脱力（手動操作のため）
@@ -158,23 +350,18 @@ class ServoController:
 
     def _set_angle(self, angle: float) -> None:
         """サーボを角度 (degrees) に設定する"""
-        if self.dry_run:
-            logging.debug("Dry-run: set angle=%.1f", angle)
-            return
-        if self._servo is None:
+        if self._set_angle_fn is None:
+            if self.dry_run:
+                return
             raise RuntimeError("サーボが初期化されていません")
         try:
-            setattr(self._servo, 'angle', float(angle))
+            self._set_angle_fn(float(angle))
         except Exception as exc:
-            logging.error("角度設定失敗: %s", exc)
+            log.error("角度設定失敗: %s", exc)
 
     def _detach(self) -> None:
-        """PWM信号を停止してサーボを解放"""
-        if self._servo is None or self.dry_run:
-            return
-        if hasattr(self._servo, 'detach'):
-            try:
-                self._servo.detach()
-                logging.debug("Servo detached")
-            except Exception:
-                logging.exception("detach失敗")
\ No newline at end of file
+        """PWM信号を停止してサーボを解放（dry-run時は何もしない）"""
+        try:
+            self._detach_fn()
+        except Exception:
+            log.exception("detach失敗")
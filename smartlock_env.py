@@ -0,0 +1,47 @@
+"""SMARTLOCK_* environment variable helpers for SmartLock.
+
+SMARTLOCK_* は初回参照時に一度だけまとめて読み、以降はスナップショットを引く。
+真偽値の判定や型変換もここに集約し、各モジュールで読み方が分かれないようにする。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Dict, Optional
+
+TRUTHY = frozenset(("1", "true", "yes", "on"))
+
+_SNAPSHOT: Optional[Dict[str, str]] = None
+
+
+def env(name: str) -> Optional[str]:
+    """環境変数 name（SMARTLOCK_*）の値。未設定なら None。"""
+    global _SNAPSHOT
+    if _SNAPSHOT is None:
+        _SNAPSHOT = {k: v for k, v in os.environ.items() if k.startswith("SMARTLOCK_")}
+    return _SNAPSHOT.get(name)
+
+
+def env_bool(name: str, default: bool) -> bool:
+    raw = env(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in TRUTHY
+
+
+def env_as(typ: type, name: str, default: Any) -> Any:
+    """環境変数 name を typ へ変換する。未設定/不正値なら default。"""
+    raw = env(name)
+    if raw is None:
+        return default
+    if typ is bool:
+        return raw.strip().lower() in TRUTHY
+    try:
+        return typ(raw)
+    except ValueError:
+        # 引数解析などログ設定前にも呼ばれるため、ルートロガーを暗黙に設定しない名前付きロガーを使う
+        logging.getLogger(__name__).warning(
+            "Invalid %s for %s=%r; ignoring", typ.__name__, name, raw
+        )
+        return default
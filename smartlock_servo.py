@@ -4,13 +4,20 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import hashlib
 import json
 import logging
-import os
+import pprint
 import signal
 import sys
-from contextlib import suppress
 from pathlib import Path
+from typing import Any, Optional
+
+try:
+    from waitress import serve  # pyright: ignore[reportMissingImports]
+except ImportError:  # pragma: no cover - optional dependency
+    serve = None
 
 try:
     from .servo_controller import ServoConfig, ServoController
@@ -21,34 +28,34 @@ except ImportError:  # pragma: no cover - direct script execution
     from sensor_controller import ReedSwitchMonitor  # type: ignore
     from web_app import create_app  # type: ignore
 
+try:
+    from .smartlock_env import env, env_as
+except ImportError:  # pragma: no cover - direct script execution
+    from smartlock_env import env, env_as  # type: ignore
 
-def _env_bool(name: str, default: bool = False) -> bool:
-    value = os.getenv(name)
-    if value is None:
-        return default
-    return value.strip().lower() in {"1", "true", "yes", "on"}
-
-
-def _env_float(name: str, default: float) -> float:
-    raw = os.getenv(name)
-    if raw is None:
-        return default
-    try:
-        return float(raw)
-    except ValueError:
-        logging.warning("Invalid float for %s=%r; using %s", name, raw, default)
-        return default
 
+# 設定ファイルを上書きするオプション: (フラグ, 型, 環境変数, ヘルプ)
+# 環境変数が未設定なら既定値は None（= 設定ファイルの値を使う）
+_ARG_SPECS = (
+    ("--pin", int, "SMARTLOCK_SERVO_PIN", None),
+    ("--min-pulse-width", float, "SMARTLOCK_MIN_PULSE_WIDTH",
+     "Servo minimum pulse width in seconds (MG996R default: 0.0005)"),
+    ("--max-pulse-width", float, "SMARTLOCK_MAX_PULSE_WIDTH",
+     "Servo maximum pulse width in seconds (MG996R default: 0.0025)"),
+    # --- 角度設定 ---
+    ("--neutral-angle", float, "SMARTLOCK_NEUTRAL_ANGLE", "待機位置（中立）の角度 (degrees, default 0.0)"),
+    ("--lock-angle", float, "SMARTLOCK_LOCK_ANGLE", "施錠時のターゲット角度 (degrees, default -90.0)"),
+    ("--unlock-angle", float, "SMARTLOCK_UNLOCK_ANGLE", "開錠時のターゲット角度 (degrees, default 90.0)"),
+    # --- 動作時間設定 ---
+    ("--move-time", float, "SMARTLOCK_MOVE_TIME", "角度移動にかける目安時間（秒）"),
+    ("--hold-time", float, "SMARTLOCK_HOLD_TIME", "回転しきった状態で保持する時間（秒）"),
+    # サーバー設定
+    ("--host", str, "SMARTLOCK_HOST", None),
+    ("--port", int, "SMARTLOCK_PORT", None),
+    ("--threads", int, "SMARTLOCK_THREADS", "waitress のワーカースレッド数"),
+    ("--log-level", str, "SMARTLOCK_LOG_LEVEL", None),
+)
 
-def _env_int(name: str, default: int) -> int:
-    raw = os.getenv(name)
-    if raw is None:
-        return default
-    try:
-        return int(raw)
-    except ValueError:
-        logging.warning("Invalid int for %s=%r; using %s", name, raw, default)
-        return default
 
 
 def _parse_args() -> argparse.Namespace:
@@ -57,63 +64,22 @@ def _parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--config",
-        default=os.getenv("SMARTLOCK_CONFIG", "config.json"),
+        default=env("SMARTLOCK_CONFIG") or "config.json",
         help="設定ファイル(JSON)へのパス（デフォルト: config.json）",
     )
 
-    # 以降のオプションは設定ファイルを上書きするための互換用
-    parser.add_argument("--pin", type=int, default=None)
-    parser.add_argument(
-        "--min-pulse-width",
-        type=float,
-        default=None,
-        help="Servo minimum pulse width in seconds (MG996R default: 0.0005)",
-    )
-    parser.add_argument(
-        "--max-pulse-width",
-        type=float,
-        default=None,
-        help="Servo maximum pulse width in seconds (MG996R default: 0.0025)",
-    )
-    # --- 角度設定 ---
-    parser.add_argument(
-        "--neutral-angle",
-        type=float,
-        default=None,
-        help="待機位置（中立）の角度 (degrees, default 0.0)",
-    )
+    for flag, typ, env_name, help_text in _ARG_SPECS:
+        parser.add_argument(flag, type=typ, default=env_as(typ, env_name, None), help=help_text)
+    # 環境変数で有効にしても --no-dry-run で打ち消せるよう、真偽両方のフラグを持たせる
     parser.add_argument(
-        "--lock-angle",
-        type=float,
-        default=None,
-        help="施錠時のターゲット角度 (degrees, default -90.0)",
+        "--dry-run",
+        action=argparse.BooleanOptionalAction,
+        default=env_as(bool, "SMARTLOCK_DRY_RUN", None),
+        help="Force simulation mode (env: SMARTLOCK_DRY_RUN)",
     )
-    parser.add_argument(
-        "--unlock-angle",
-        type=float,
-        default=None,
-        help="開錠時のターゲット角度 (degrees, default 90.0)",
-    )
-    # --- 動作時間設定 ---
-    parser.add_argument(
-        "--move-time",
-        type=float,
-        default=None,
-        help="角度移動にかける目安時間（秒）",
-    )
-    parser.add_argument(
-        "--hold-time",
-        type=float,
-        default=None,
-        help="回転しきった状態で保持する時間（秒）",
-    )
-
-    # サーバー設定
-    parser.add_argument("--host", default=None)
-    parser.add_argument("--port", type=int, default=None)
-    parser.add_argument("--log-level", default=None)
-    parser.add_argument("--dry-run", action="store_true", help="Force simulation mode")
+    # デバッグモード（Werkzeugのデバッガ付き開発サーバー）は環境変数では有効にしない
     parser.add_argument("--debug", action="store_true", help="Enable Flask debug mode")
+
     parser.add_argument(
         "--ssl",
         choices=('none', 'adhoc', 'cert'),
@@ -122,13 +88,32 @@ def _parse_args() -> argparse.Namespace:
     )
     parser.add_argument("--cert", help="SSL証明書ファイルへのパス")
     parser.add_argument("--key", help="SSL秘密鍵ファイルへのパス")
+
+    sub = parser.add_subparsers(dest="command")
+    compile_p = sub.add_parser(
+        "compile-config",
+        help="--config の内容を解決済みのPythonモジュールとして書き出す（起動時のJSON解析を省略）",
+    )
+    compile_p.add_argument(
+        "--output",
+        default=str(_COMPILED_PATH),
+        help=f"出力先（デフォルト: {_COMPILED_PATH.name}）",
+    )
     return parser.parse_args()
 
 
-def _load_config(path: str) -> dict:
+_COMPILED_PATH = Path(__file__).resolve().parent / "config_compiled.py"
+
+
+def _config_path(path: str) -> Path:
     cfg_path = Path(path)
     if not cfg_path.is_absolute():
         cfg_path = Path(__file__).resolve().parent / cfg_path
+    return cfg_path
+
+
+def _load_config(path: str) -> dict:
+    cfg_path = _config_path(path)
     if not cfg_path.exists():
         raise SystemExit(f"設定ファイルが見つかりません: {cfg_path}")
     try:
@@ -146,6 +131,101 @@ def _cfg_get(cfg: dict, path: str, default):
     return cur
 
 
+def _resolve_config(cfg: dict) -> dict:
+    """設定(dict)を既定値込みで解決し、main() がそのまま使える形にする。"""
+    servo_cfg = _cfg_get(cfg, "servo", {})
+    web_cfg = _cfg_get(cfg, "web", {})
+    ssl_cfg = web_cfg.get("ssl", {}) if isinstance(web_cfg, dict) else {}
+    features_cfg = _cfg_get(cfg, "features", {})
+    if not isinstance(features_cfg, dict):
+        features_cfg = {}
+
+    return {
+        "log_level": str(_cfg_get(cfg, "logging.level", "INFO")),
+        "dry_run": bool(_cfg_get(cfg, "dry_run", False)),
+        "servo": {
+            "pin": int(servo_cfg.get("pin", 12)),
+            "min_pulse_width": float(servo_cfg.get("min_pulse_width", 0.0005)),
+            "max_pulse_width": float(servo_cfg.get("max_pulse_width", 0.0025)),
+            "neutral_angle": float(servo_cfg.get("neutral_angle", 0.0)),
+            "lock_angle": float(servo_cfg.get("lock_angle", -85.0)),
+            "unlock_angle": float(servo_cfg.get("unlock_angle", 85.0)),
+            "move_time": float(servo_cfg.get("move_time", 0.5)),
+            "hold_time": float(servo_cfg.get("hold_time", 0.5)),
+            "precise_timing": bool(servo_cfg.get("precise_timing", False)),
+        },
+        "sensors": _cfg_get(cfg, "sensors", {}),
+        "web": {
+            "host": str(web_cfg.get("host", "0.0.0.0")),
+            "port": int(web_cfg.get("port", 8080)),
+            "debug": bool(web_cfg.get("debug", False)),
+            "threads": int(web_cfg.get("threads", 8)),
+            "ssl_mode": ssl_cfg.get("mode", "none"),
+            "cert": ssl_cfg.get("cert"),
+            "key": ssl_cfg.get("key"),
+        },
+        "features": {
+            "auto_lock_seconds": float(features_cfg.get("auto_lock_seconds", 0)),
+            "action_confirm_timeout_seconds": float(features_cfg.get("action_confirm_timeout_seconds", 3.0)),
+            "sensor_poll_interval_seconds": float(features_cfg.get("sensor_poll_interval_seconds", 0.1)),
+            "confirm_actions": bool(features_cfg.get("confirm_actions", True)),
+        },
+    }
+
+
+def _schema_id() -> str:
+    """_resolve_config の出力形式を表す識別子（このファイルの内容のハッシュ）。
+
+    コード更新で設定キーが増減したら、古いコンパイル済み設定を使わないようにするため。
+    """
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+
+def _compile_config(path: str, output: str) -> Path:
+    """config.json を解決済みの定数モジュールとして書き出す。"""
+    cfg_path = _config_path(path)
+    settings = _resolve_config(_load_config(path))
+    out_path = Path(output)
+    out_path.write_text(
+        '"""Generated by `smartlock_servo compile-config`. Do not edit."""\n\n'
+        f"SOURCE = {str(cfg_path)!r}\n"
+        f"SOURCE_MTIME_NS = {cfg_path.stat().st_mtime_ns!r}\n"
+        f"SCHEMA = {_schema_id()!r}\n"
+        f"SETTINGS = {pprint.pformat(settings, sort_dicts=False)}\n",
+        encoding="utf-8",
+    )
+    return out_path
+
+
+def _import_compiled() -> Optional[Any]:
+    try:
+        from . import config_compiled  # type: ignore[attr-defined]
+    except ImportError:
+        try:
+            import config_compiled  # type: ignore
+        except ImportError:
+            return None
+    return config_compiled
+
+
+def _load_settings(path: str) -> dict:
+    """コンパイル済み設定が元ファイル・現在のコードと一致すればそれを使い、なければJSONを読む。"""
+    cfg_path = _config_path(path)
+    compiled = _import_compiled()
+    if compiled is not None:
+        try:
+            fresh = (
+                getattr(compiled, "SOURCE", None) == str(cfg_path)
+                and getattr(compiled, "SOURCE_MTIME_NS", None) == cfg_path.stat().st_mtime_ns
+                and getattr(compiled, "SCHEMA", None) == _schema_id()
+            )
+        except OSError:
+            fresh = False
+        if fresh:
+            return compiled.SETTINGS
+    return _resolve_config(_load_config(path))
+
+
 def _pick(arg_value, cfg_value, default):
     return cfg_value if arg_value is None else arg_value
 
@@ -165,38 +245,44 @@ def _configure_logging(level_name: str) -> None:
     )
 
 
-def _register_signal_handlers(servo: ServoController) -> None:
+def _exit_on_sigterm() -> None:
+    # 既定の SIGTERM はPythonの終了処理を経ずにプロセスを落とすため、
+    # SystemExit に変換して atexit の後始末を走らせる（SIGINT は KeyboardInterrupt のまま）
     def _handler(signum, _frame):
         logging.info("Received signal %s; shutting down", signum)
-        servo.cleanup()
         sys.exit(0)
 
-    for sig in (signal.SIGINT, signal.SIGTERM):
-        signal.signal(sig, _handler)
+    signal.signal(signal.SIGTERM, _handler)
 
 
 def main() -> None:
     args = _parse_args()
 
-    cfg = _load_config(args.config)
+    if args.command == "compile-config":
+        _configure_logging("INFO")
+        out_path = _compile_config(args.config, args.output)
+        logging.info("Compiled %s -> %s", _config_path(args.config), out_path)
+        return
+
+    settings = _load_settings(args.config)
 
-    log_level = _pick(args.log_level, _cfg_get(cfg, "logging.level", "INFO"), "INFO")
+    log_level = _pick(args.log_level, settings["log_level"], "INFO")
     _configure_logging(str(log_level))
 
-    dry_run_cfg = bool(_cfg_get(cfg, "dry_run", False))
-    dry_run = bool(args.dry_run) or dry_run_cfg
+    dry_run = bool(_pick(args.dry_run, settings["dry_run"], False))
 
     # 修正された ServoConfig に合わせてパラメータを設定
-    servo_cfg = _cfg_get(cfg, "servo", {})
+    servo_cfg = settings["servo"]
     config = ServoConfig(
-        pin=int(_pick(args.pin, servo_cfg.get("pin", 12), 12)),
-        min_pulse_width=float(_pick(args.min_pulse_width, servo_cfg.get("min_pulse_width", 0.0005), 0.0005)),
-        max_pulse_width=float(_pick(args.max_pulse_width, servo_cfg.get("max_pulse_width", 0.0025), 0.0025)),
-        neutral_angle=float(_pick(args.neutral_angle, servo_cfg.get("neutral_angle", 0.0), 0.0)),
-        lock_angle=float(_pick(args.lock_angle, servo_cfg.get("lock_angle", -85.0), -85.0)),
-        unlock_angle=float(_pick(args.unlock_angle, servo_cfg.get("unlock_angle", 85.0), 85.0)),
-        move_time=float(_pick(args.move_time, servo_cfg.get("move_time", 0.5), 0.5)),
-        hold_time=float(_pick(args.hold_time, servo_cfg.get("hold_time", 0.5), 0.5)),
+        pin=int(_pick(args.pin, servo_cfg["pin"], 12)),
+        min_pulse_width=float(_pick(args.min_pulse_width, servo_cfg["min_pulse_width"], 0.0005)),
+        max_pulse_width=float(_pick(args.max_pulse_width, servo_cfg["max_pulse_width"], 0.0025)),
+        neutral_angle=float(_pick(args.neutral_angle, servo_cfg["neutral_angle"], 0.0)),
+        lock_angle=float(_pick(args.lock_angle, servo_cfg["lock_angle"], -85.0)),
+        unlock_angle=float(_pick(args.unlock_angle, servo_cfg["unlock_angle"], 85.0)),
+        move_time=float(_pick(args.move_time, servo_cfg["move_time"], 0.5)),
+        hold_time=float(_pick(args.hold_time, servo_cfg["hold_time"], 0.5)),
+        precise_timing=servo_cfg["precise_timing"],
     )
 
     logging.info(
@@ -205,19 +291,19 @@ def main() -> None:
     )
 
     servo = ServoController(config, dry_run=dry_run)
-    sensors = ReedSwitchMonitor.from_config(_cfg_get(cfg, "sensors", {}), dry_run=dry_run)
-    _register_signal_handlers(servo)
+    sensors = ReedSwitchMonitor.from_config(settings["sensors"], dry_run=dry_run)
+    _exit_on_sigterm()
 
-    web_cfg = _cfg_get(cfg, "web", {})
-    ssl_cfg = web_cfg.get("ssl", {}) if isinstance(web_cfg, dict) else {}
+    web_cfg = settings["web"]
 
-    host = str(_pick(args.host, web_cfg.get("host", "0.0.0.0"), "0.0.0.0"))
-    port = int(_pick(args.port, web_cfg.get("port", 8080), 8080))
-    debug = bool(args.debug) or bool(web_cfg.get("debug", False))
+    host = str(_pick(args.host, web_cfg["host"], "0.0.0.0"))
+    port = int(_pick(args.port, web_cfg["port"], 8080))
+    debug = bool(args.debug) or web_cfg["debug"]
+    threads = max(1, int(_pick(args.threads, web_cfg["threads"], 8)))
 
-    ssl_mode = _pick(args.ssl, ssl_cfg.get("mode", "none"), "none")
-    cert = args.cert if args.cert else ssl_cfg.get("cert")
-    key = args.key if args.key else ssl_cfg.get("key")
+    ssl_mode = _pick(args.ssl, web_cfg["ssl_mode"], "none")
+    cert = args.cert if args.cert else web_cfg["cert"]
+    key = args.key if args.key else web_cfg["key"]
 
     ssl_context = None
     if ssl_mode == 'adhoc':
@@ -228,32 +314,40 @@ def main() -> None:
         ssl_context = (cert, key)
 
     try:
+        # 後始末は atexit に任せる（登録と逆順: センサー→サーボの順に解放される）
         servo.initialize()
+        atexit.register(servo.cleanup)
         sensors.initialize()
-        features_cfg = _cfg_get(cfg, "features", {})
-        auto_lock_seconds = float(features_cfg.get("auto_lock_seconds", 0)) if isinstance(features_cfg, dict) else 0.0
-        action_confirm_timeout_s = float(features_cfg.get("action_confirm_timeout_seconds", 3.0)) if isinstance(features_cfg, dict) else 3.0
+        atexit.register(sensors.cleanup)
+        features_cfg = settings["features"]
+        auto_lock_seconds = features_cfg["auto_lock_seconds"]
+        action_confirm_timeout_s = features_cfg["action_confirm_timeout_seconds"]
+        sensor_poll_interval_s = features_cfg["sensor_poll_interval_seconds"]
 
         app = create_app(
             servo,
             sensors,
             auto_lock_seconds_default=auto_lock_seconds,
             action_confirm_timeout_s=action_confirm_timeout_s,
+            sensor_poll_interval_s=sensor_poll_interval_s,
+            confirm_actions=features_cfg["confirm_actions"],
         )
-        app.run(
-            host=host,
-            port=port,
-            debug=debug,
-            use_reloader=False,
-            ssl_context=ssl_context,
-        )
+        if serve is not None and ssl_context is None and not debug:
+            # 本番用WSGIサーバー（スレッドプールでステータス取得と施錠操作を並行処理）
+            # サーボ動作自体は ServoController 内で直列化される
+            logging.info("Serving with waitress on %s:%d (threads=%d)", host, port, threads)
+            serve(app, host=host, port=port, threads=threads, _quiet=True)
+        else:
+            # TLS/デバッグ時、または waitress 未導入時は Flask 開発サーバー
+            app.run(
+                host=host,
+                port=port,
+                debug=debug,
+                use_reloader=False,
+                ssl_context=ssl_context,
+            )
     except KeyboardInterrupt:
         logging.info('Interrupted; shutting down')
-    finally:
-        with suppress(Exception):
-            sensors.cleanup()
-        with suppress(Exception):
-            servo.cleanup()
 
 
 if __name__ == "__main__":
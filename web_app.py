@@ -2,16 +2,30 @@
 
 from __future__ import annotations
 
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+import atexit
+import itertools
+import json
+import logging
+import os
 import threading
 import time
+import weakref
+import zlib
 
 try:
-    from flask import Flask, jsonify, render_template, request  # pyright: ignore[reportMissingImports]
+    from flask import Flask, Response, render_template, request  # pyright: ignore[reportMissingImports]
+    from flask.sessions import SecureCookieSessionInterface  # pyright: ignore[reportMissingImports]
 except ImportError as exc:  # pragma: no cover - configuration error
     raise RuntimeError("Flask is required. Install with 'pip install flask'.") from exc
 
+try:
+    import orjson  # pyright: ignore[reportMissingImports]
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 try:
     from .servo_controller import ServoController
 except ImportError:  # pragma: no cover - direct script execution
@@ -22,6 +36,68 @@ try:
 except ImportError:  # pragma: no cover - direct script execution
     from sensor_controller import ReedSwitchMonitor  # type: ignore
 
+# テンプレートディレクトリはパッケージ内の templates 配下を指す（解決は読み込み時に一度だけ）
+_TEMPLATE_DIR = str(Path(__file__).resolve().parent / "templates")
+
+# /api/status の組み立て結果を再利用する期間（秒）
+STATUS_CACHE_TTL_S = 0.2
+
+
+def _dumps(payload: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    # 日本語メッセージを \uXXXX へエスケープせずUTF-8のまま返す
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json(payload: Dict[str, Any], status: int = 200) -> Response:
+    return Response(_dumps(payload), status=status, mimetype="application/json")
+
+
+class _AppHandle:
+    """create_app() で作ったアプリの停止用ハンドル（サーボへの参照は持たない）。"""
+
+    def __init__(self) -> None:
+        # 自動施錠スレッドの停止要求と、周期を待たずにセンサーを読み直させる合図
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        # 同じサーボに新しいアプリが作られたら立てる（以降このアプリは操作を受け付けない）
+        self.retired = False
+
+    def retire(self) -> None:
+        self.retired = True
+        self.stop_event.set()
+        self.wake_event.set()
+
+
+# サーボ毎に最新のアプリだけを有効にする。サーボ側に属性を持たせず、ここを弱参照で引く
+_APPS: "weakref.WeakKeyDictionary[Any, _AppHandle]" = weakref.WeakKeyDictionary()
+_APPS_LOCK = threading.Lock()
+
+
+def _register_app(servo: Any) -> _AppHandle:
+    """servo に新しいアプリを登録し、前のアプリがあれば退役させる。"""
+    handle = _AppHandle()
+    with _APPS_LOCK:
+        try:
+            previous = _APPS.get(servo)
+            _APPS[servo] = handle
+        except TypeError:
+            # 弱参照/ハッシュできないサーボ（テスト用のスタブ等）は登録せずに使う
+            return handle
+    if previous is not None:
+        previous.retire()
+    return handle
+
+
+class ApiNullSessionInterface(SecureCookieSessionInterface):
+    """/api/ 配下ではセッションCookieを開かない（署名やCookie解析を省く）。"""
+
+    def open_session(self, app: Flask, request: Any) -> Any:
+        if request.path.startswith("/api/"):
+            return self.make_null_session(app)
+        return super().open_session(app, request)
+
 
 def create_app(
     servo: ServoController,
@@ -29,50 +105,69 @@ def create_app(
     *,
     auto_lock_seconds_default: float = 0.0,
     action_confirm_timeout_s: float = 3.0,
+    sensor_poll_interval_s: float = 0.1,
+    confirm_actions: bool = True,
 ) -> Flask:
-    # テンプレートディレクトリはパッケージ内の templates 配下を指す
-    template_dir = Path(__file__).resolve().parent / "templates"
-    app = Flask(__name__, template_folder=str(template_dir))
+    # センサーの観測値・完了確認・動作の直列化はアプリ毎に持つため、1つのサーボで操作を受け付けるのは
+    # 最後に作ったアプリだけにする（前のアプリは自動施錠を止め、操作には 409 superseded を返す）
+    handle = _register_app(servo)
+
+    # Flaskから配信する静的ファイルは無いため /static は登録しない
+    app = Flask(__name__, static_folder=None, template_folder=_TEMPLATE_DIR)
+    app.session_interface = ApiNullSessionInterface()
+
+    # アプリ稼働中に変わらない項目は一度だけ組み立てておく
+    static_status: Dict[str, Any] = {
+        "dryRun": servo.dry_run,
+        "pin": servo.config.pin,
+        "angles": {
+            "neutral": servo.config.neutral_angle,
+            "lock": servo.config.lock_angle,
+            "unlock": servo.config.unlock_angle,
+        },
+        "times": {
+            "move": servo.config.move_time,
+            "hold": servo.config.hold_time,
+        },
+    }
 
     state_lock = threading.Lock()
     auto_lock_seconds: float = float(auto_lock_seconds_default)
     last_unlock_ts: Optional[float] = None
     virtual_locked: Optional[bool] = None
-
-    action_confirm_timeout_s = float(action_confirm_timeout_s)
+    # 表示に関わる状態が変わる度に増やす（/api/status キャッシュの無効化用）
+    state_version = 0
+    status_cache: Tuple[float, int, bytes] = (0.0, -1, b"")
+    # state_version はプロセス毎に0から数え直すため、ETagには起動毎の乱数を混ぜる
+    # （再起動前に取得した本文へ 304 を返して、別の施錠状態を表示させないため）
+    etag_salt = os.urandom(4).hex()
+    # 自動施錠スレッドが観測した施錠状態（完了確認の判定に使う）
+    observed_locked: Optional[bool] = None
+    # GPIOを読むのは自動施錠スレッドだけにし、(lock_switch_on, door_switch_on) をここへ公開する。
+    # タプルの再代入はアトミックなので、ハンドラはロック無しで読んでよい
+    sensor_snapshot: Tuple[Optional[bool], Optional[bool]] = (None, None)
+    # 受付済みで未完了の操作（サーボ動作中、または完了確認待ち）。1件ずつだけ受け付ける
+    # 完了確認待ちの間は "deadline" を持ち、自動施錠スレッドが周期毎に判定する（誰もブロックしない）
+    pending: Optional[Dict[str, Any]] = None
+    # 受付毎の通し番号。202応答と action.last に入れ、クライアントが自分の結果を見分けられるようにする
+    action_ids = itertools.count(1)
+    last_action: Optional[Dict[str, Any]] = None
+    stop_event = handle.stop_event
+    wake_event = handle.wake_event
+
+    # 完了確認の待ち時間は起動時に一度だけ正規化しておく
+    action_confirm_timeout_s = max(0.0, float(action_confirm_timeout_s))
+    sensor_poll_interval_s = max(0.01, float(sensor_poll_interval_s))
 
     def _now() -> float:
-        # MicroPython互換も意識してtime.timeを使用
-        return float(time.time())
-
-    def _wait_for_lock_state(expected_locked: bool, timeout_s: float) -> Dict[str, Any]:
-        """リードスイッチで施錠状態が期待値になるまで待つ。
-
-        センサー未設定/取得不可の場合は confirmed=False で返す（動作をブロックしない）。
-        """
-        if not sensors:
-            return {"confirmed": False, "observedLocked": None, "source": "no_sensor"}
-
-        deadline = _now() + max(0.0, float(timeout_s))
-        observed: Optional[bool] = None
-        while _now() <= deadline:
-            observed = sensors.is_locked()
-            if observed is True and expected_locked is True:
-                return {"confirmed": True, "observedLocked": observed, "source": "sensor"}
-            if observed is False and expected_locked is False:
-                return {"confirmed": True, "observedLocked": observed, "source": "sensor"}
-            time.sleep(0.05)
-        return {"confirmed": False, "observedLocked": observed, "source": "timeout"}
+        # 経過時間の計算にのみ使うため単調時計を使う（NTPによる時刻の飛びの影響を受けない）
+        return time.monotonic()
 
     def _read_sensor_state() -> Dict[str, Any]:
-        lock_on = sensors.lock_switch_on() if sensors else None
-        door_on = sensors.door_switch_on() if sensors else None
+        lock_on, door_on = sensor_snapshot
 
-        state_lock.acquire()
-        try:
+        with state_lock:
             v_locked = virtual_locked
-        finally:
-            state_lock.release()
 
         effective_locked = lock_on if lock_on is not None else v_locked
         return {
@@ -87,176 +182,247 @@ def create_app(
 
     def _current() -> Dict[str, Any]:
         """現在の設定とステータスを返す。"""
-        state_lock.acquire()
-        try:
+        with state_lock:
             als = auto_lock_seconds
             lu = last_unlock_ts
-        finally:
-            state_lock.release()
+            busy = pending is not None
+            last = last_action
 
         sensors_state = _read_sensor_state()
         now = _now()
 
         return {
             "status": "idle",  # 基本的に常に待機・脱力状態
-            "dryRun": servo.dry_run,
-            "pin": servo.config.pin,
+            **static_status,
             "sensors": sensors_state,
             "autoLock": {
                 "seconds": als,
                 "enabled": als > 0,
                 "secondsSinceLastUnlock": None if lu is None else max(0.0, now - lu),
             },
-            "angles": {
-                "neutral": servo.config.neutral_angle,
-                "lock": servo.config.lock_angle,
-                "unlock": servo.config.unlock_angle,
-            },
-            "times": {
-                "move": servo.config.move_time,
-                "hold": servo.config.hold_time,
-            },
+            # 実行中か、および直近の施錠/開錠の結果（lastAction/actionConfirm/warning/message）
+            "action": {"busy": busy, "last": last},
         }
 
     def _door_is_open() -> Optional[bool]:
+        # 施錠可否の安全判定なので、スナップショットではなくその場でセンサーを読む
         if not sensors:
             return None
-        closed = sensors.is_door_closed()
+        closed = sensors.door_switch_on_now()
         return None if closed is None else (not closed)
 
     def _is_locked() -> Optional[bool]:
-        state_lock.acquire()
-        try:
+        with state_lock:
             v_locked = virtual_locked
-        finally:
-            state_lock.release()
 
-        if not sensors:
-            return v_locked
-        locked = sensors.is_locked()
+        locked = sensor_snapshot[0]
         return locked if locked is not None else v_locked
 
-    def _set_virtual_locked(value: Optional[bool]) -> None:
-        nonlocal virtual_locked
-        state_lock.acquire()
-        try:
-            virtual_locked = value
-        finally:
-            state_lock.release()
-
-    def _set_last_unlock_now() -> None:
-        nonlocal last_unlock_ts
-        state_lock.acquire()
-        try:
-            last_unlock_ts = _now()
-        finally:
-            state_lock.release()
-
-    def _set_auto_lock_seconds(value: float) -> None:
-        nonlocal auto_lock_seconds
-        state_lock.acquire()
-        try:
-            auto_lock_seconds = max(0.0, float(value))
-        finally:
-            state_lock.release()
-
     @app.get("/api/status")
     def status() -> Any:
         # ステータスをポーリングするためのエンドポイント
-        return jsonify(_current())
+        # 状態が変わっていなければ、直近に組み立てたJSONをTTLの間だけ使い回す
+        nonlocal status_cache
+        ts = _now()
+        with state_lock:
+            version = state_version
+            als = auto_lock_seconds
+            lu = last_unlock_ts
+        # ETagは状態の版と、自動施錠が有効な間だけ「前回開錠からの秒数（整数）」から作る
+        # （UIが表示する経過秒は変わるが、それ以外の値の刻みでは再送しない弱い検証子）
+        tick = int(ts - lu) if als > 0 and lu is not None else -1
+        etag = 'W/"%x"' % zlib.crc32(repr((etag_salt, version, tick)).encode())
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+        cached_ts, cached_version, body = status_cache
+        if cached_version != version or ts - cached_ts >= STATUS_CACHE_TTL_S:
+            body = _dumps(_current())
+            status_cache = (ts, version, body)
+        return Response(
+            body,
+            mimetype="application/json",
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+
+    def _superseded() -> Response:
+        response = _current()
+        response["error"] = "superseded"
+        response["message"] = "このサーボには新しいアプリが作られたため、操作を受け付けません"
+        return _json(response, 409)
 
     @app.post("/api/autolock")
     def set_autolock() -> Any:
+        nonlocal auto_lock_seconds, state_version
+        if handle.retired:
+            return _superseded()
         payload = request.get_json(silent=True) or {}
         seconds = payload.get("seconds", 0) if isinstance(payload, dict) else 0
         try:
             seconds_f = float(seconds)
         except Exception:
-            return jsonify({"error": "invalid_seconds"}), 400
+            return _json({"error": "invalid_seconds"}, 400)
 
-        _set_auto_lock_seconds(seconds_f)
+        with state_lock:
+            auto_lock_seconds = max(0.0, seconds_f)
+            state_version += 1
         response = _current()
         response["lastAction"] = "autolock_updated"
-        return jsonify(response)
-
-    @app.post("/api/lock")
-    def do_lock() -> Any:
+        return _json(response)
+
+    # 操作ごとの差分: (サーボへの投入, 完了時の施錠状態, 未確認時のwarning, 未確認時のmessage)
+    actions: Dict[str, Tuple[Callable[[], Future], bool, str, str]] = {
+        "lock": (
+            servo.submit_lock,
+            True,
+            "lock_not_confirmed",
+            "施錠コマンドは実行しましたが、リードスイッチで施錠完了を確認できませんでした",
+        ),
+        "unlock": (
+            servo.submit_unlock,
+            False,
+            "unlock_not_confirmed",
+            "開錠コマンドは実行しましたが、リードスイッチで開錠完了を確認できませんでした",
+        ),
+    }
+
+    def _finish(result: Dict[str, Any]) -> None:
+        """state_lock 保持中に呼ぶ。受付中の操作を終え、結果を action.last に公開する。"""
+        nonlocal pending, virtual_locked, last_action, state_version
+        if pending is None:
+            return
+        if result.get("actionConfirm", {}).get("confirmed") is True:
+            virtual_locked = actions[pending["key"]][1]
+        pending = None
+        last_action = result
+        state_version += 1
+
+    def _confirmed_result(confirm: Dict[str, Any]) -> Dict[str, Any]:
+        """state_lock 保持中に呼ぶ。受付中の操作の完了確認結果を組み立てる。"""
+        assert pending is not None
+        _, _, warning, message = actions[pending["key"]]
+        result: Dict[str, Any] = {
+            "actionId": pending["actionId"],
+            "trigger": pending["trigger"],
+            "lastAction": pending["result"],
+            "actionConfirm": confirm,
+        }
+        if confirm.get("confirmed") is not True:
+            result["warning"] = warning
+            result["message"] = message
+        return result
+
+    def _fail(action_key: str, action_id: int, trigger: str) -> None:
+        # 202 応答済みなので、失敗はログと action.last で知らせる
+        with state_lock:
+            _finish({
+                "actionId": action_id,
+                "trigger": trigger,
+                "lastAction": action_key,
+                "error": "servo_failed",
+                "message": "サーボの動作に失敗しました",
+            })
+
+    def _on_moved(future: Future, action_key: str, action_id: int, trigger: str) -> None:
+        """サーボ動作の完了時に呼ばれる（サーボのワーカースレッドで動くので待機しない）。"""
+        nonlocal last_unlock_ts, state_version
+        if future.cancelled():
+            # 終了処理でキューから破棄された
+            _fail(action_key, action_id, trigger)
+            return
+        exc = future.exception()
+        if exc is not None:
+            logging.error("サーボ動作に失敗しました: %s (id=%d)", action_key, action_id, exc_info=exc)
+            _fail(action_key, action_id, trigger)
+            return
+        # 動作直後の状態をすぐに観測させる
+        wake_event.set()
+        expected_locked = actions[action_key][1]
+        with state_lock:
+            if pending is None or pending["actionId"] != action_id:
+                return
+            pending["result"] = future.result()
+            if not expected_locked:
+                last_unlock_ts = _now()
+            if not confirm_actions:
+                _finish(_confirmed_result({"confirmed": False, "observedLocked": None, "source": "disabled"}))
+            elif not sensors:
+                _finish(_confirmed_result({"confirmed": False, "observedLocked": None, "source": "no_sensor"}))
+            elif observed_locked is expected_locked:
+                _finish(_confirmed_result({"confirmed": True, "observedLocked": observed_locked, "source": "sensor"}))
+            else:
+                # 以降の判定は自動施錠スレッドの _resolve_pending() に任せる
+                pending["deadline"] = _now() + action_confirm_timeout_s
+                state_version += 1
+
+    def _resolve_pending(stopping: bool = False) -> None:
+        """完了確認待ちの操作を観測値・期限で確定させる（自動施錠スレッドから周期的に呼ぶ）。"""
+        with state_lock:
+            if pending is None or "deadline" not in pending:
+                return
+            expected_locked = actions[pending["key"]][1]
+            if observed_locked is expected_locked:
+                _finish(_confirmed_result({"confirmed": True, "observedLocked": observed_locked, "source": "sensor"}))
+            elif stopping:
+                # 停止時は期限まで待たずに未確認で終える
+                _finish(_confirmed_result({"confirmed": False, "observedLocked": observed_locked, "source": "stopped"}))
+            elif _now() >= pending["deadline"]:
+                _finish(_confirmed_result({"confirmed": False, "observedLocked": observed_locked, "source": "timeout"}))
+
+    def _submit(action_key: str, trigger: str) -> Optional[int]:
+        """サーボへ投入して受付番号を返す。前の操作がまだ終わっていなければ None。"""
+        nonlocal pending, state_version
+        with state_lock:
+            if pending is not None:
+                return None
+            action_id = next(action_ids)
+            pending = {"actionId": action_id, "trigger": trigger, "key": action_key}
+            state_version += 1
+        try:
+            future = actions[action_key][0]()
+        except Exception:
+            # 未初期化・終了処理中・要求過多など、投入自体を断られた場合
+            logging.exception("サーボへの動作要求に失敗しました: %s (id=%d)", action_key, action_id)
+            _fail(action_key, action_id, trigger)
+            return action_id
+        future.add_done_callback(lambda f: _on_moved(f, action_key, action_id, trigger))
+        return action_id
+
+    def _perform(action_key: str) -> Response:
+        """施錠/開錠を受け付けて 202 を返す。
+
+        結果は /api/status の action.last で確認する。
+        失敗時(409)はUIが再描画できるよう _current() を含める。
+        """
+        if handle.retired:
+            return _superseded()
         # ドアが開いている場合は施錠拒否
-        door_open = _door_is_open()
-        if door_open is True:
+        if actions[action_key][1] and _door_is_open() is True:
             response = _current()
             response["error"] = "door_open"
             response["message"] = "ドアが開いているため施錠できません"
-            return jsonify(response), 409
+            return _json(response, 409)
 
-        action_result = servo.lock()
-        confirm = _wait_for_lock_state(True, action_confirm_timeout_s)
-        if confirm.get("confirmed") is True:
-            _set_virtual_locked(True)
+        action_id = _submit(action_key, "api")
+        if action_id is None:
+            response = _current()
+            response["error"] = "busy"
+            response["message"] = "前の操作を実行中です"
+            return _json(response, 409)
+        return _json({"lastAction": f"{action_key}_submitted", "actionId": action_id}, 202)
 
-        response = _current()
-        response["lastAction"] = action_result
-        response["actionConfirm"] = confirm
-        if confirm.get("confirmed") is not True:
-            response["warning"] = "lock_not_confirmed"
-            response["message"] = "施錠コマンドは実行しましたが、リードスイッチで施錠完了を確認できませんでした"
-        return jsonify(response)
+    @app.post("/api/lock")
+    def do_lock() -> Any:
+        return _perform("lock")
 
     @app.post("/api/unlock")
     def do_unlock() -> Any:
-        # 解錠コマンドを発行
-        action_result = servo.unlock()
-
-        _set_last_unlock_now()
-        confirm = _wait_for_lock_state(False, action_confirm_timeout_s)
-        if confirm.get("confirmed") is True:
-            _set_virtual_locked(False)
-        
-        response = _current()
-        response["lastAction"] = action_result  # "unlocked"
-        response["actionConfirm"] = confirm
-        if confirm.get("confirmed") is not True:
-            response["warning"] = "unlock_not_confirmed"
-            response["message"] = "開錠コマンドは実行しましたが、リードスイッチで開錠完了を確認できませんでした"
-        return jsonify(response)
+        return _perform("unlock")
 
     @app.post("/api/toggle")
     def do_toggle() -> Any:
-        locked = _is_locked()
         # 状態不明時は安全側で「開錠」を実行して状態を確定させる
-        if locked is None or locked is True:
-            action_result = servo.unlock()
-            _set_last_unlock_now()
-            confirm = _wait_for_lock_state(False, action_confirm_timeout_s)
-            if confirm.get("confirmed") is True:
-                _set_virtual_locked(False)
-            response = _current()
-            response["lastAction"] = action_result
-            response["actionConfirm"] = confirm
-            if confirm.get("confirmed") is not True:
-                response["warning"] = "unlock_not_confirmed"
-                response["message"] = "開錠コマンドは実行しましたが、リードスイッチで開錠完了を確認できませんでした"
-            return jsonify(response)
-
-        # unlocked -> lock (door open check)
-        door_open = _door_is_open()
-        if door_open is True:
-            response = _current()
-            response["error"] = "door_open"
-            response["message"] = "ドアが開いているため施錠できません"
-            return jsonify(response), 409
-
-        action_result = servo.lock()
-        confirm = _wait_for_lock_state(True, action_confirm_timeout_s)
-        if confirm.get("confirmed") is True:
-            _set_virtual_locked(True)
-        response = _current()
-        response["lastAction"] = action_result
-        response["actionConfirm"] = confirm
-        if confirm.get("confirmed") is not True:
-            response["warning"] = "lock_not_confirmed"
-            response["message"] = "施錠コマンドは実行しましたが、リードスイッチで施錠完了を確認できませんでした"
-        return jsonify(response)
+        return _perform("lock" if _is_locked() is False else "unlock")
 
     @app.get("/")
     def index() -> Any:
@@ -264,47 +430,62 @@ def create_app(
         return render_template("index.html")
 
     def _start_autolock_thread() -> None:
+        # センサー無しでは観測値が常にNoneで自動施錠も働かないため、スレッド自体を起動しない
         if not sensors:
             return
-
         sensors_local = sensors
 
-        nonlocal last_unlock_ts
+        nonlocal virtual_locked, last_unlock_ts, state_version, sensor_snapshot
 
         # 起動時点のセンサー状態をvirtual_lockedへ同期
         try:
-            initial_locked = sensors_local.is_locked()
+            sensor_snapshot = sensors_local.snapshot()
+            initial_locked = sensor_snapshot[0]
             if initial_locked is not None:
-                _set_virtual_locked(initial_locked)
+                with state_lock:
+                    virtual_locked = initial_locked
+                    state_version += 1
             # 起動時点で既に開錠なら、起動時刻を「前回開錠」とみなす
             if initial_locked is False:
-                state_lock.acquire()
-                try:
+                with state_lock:
                     last_unlock_ts = _now()
-                finally:
-                    state_lock.release()
+                    state_version += 1
         except Exception:
             pass
 
         def _loop() -> None:
-            nonlocal last_unlock_ts
+            nonlocal virtual_locked, last_unlock_ts, observed_locked, state_version, sensor_snapshot
             prev_locked: Optional[bool] = None
-            while True:
+            prev_door_closed: Optional[bool] = None
+            while not stop_event.is_set():
                 try:
-                    locked = sensors_local.is_locked()
-                    door_closed = sensors_local.is_door_closed()
+                    sensor_snapshot = sensors_local.snapshot()
+                    # リードスイッチON=施錠 / ON=ドア閉
+                    locked, door_closed = sensor_snapshot
+
+                    if locked != observed_locked:
+                        with state_lock:
+                            observed_locked = locked
+                            state_version += 1
+                    # 完了確認待ちの操作があれば、今回の観測値で判定する
+                    _resolve_pending()
+                    if door_closed != prev_door_closed:
+                        prev_door_closed = door_closed
+                        with state_lock:
+                            state_version += 1
 
                     # センサーが取れているなら、常にvirtual_lockedへ反映
                     if locked is not None:
-                        _set_virtual_locked(locked)
+                        with state_lock:
+                            if virtual_locked != locked:
+                                virtual_locked = locked
+                                state_version += 1
 
                     # 施錠->開錠への遷移を検知（手動開錠も含めてタイムスタンプ更新）
                     if prev_locked is True and locked is False:
-                        state_lock.acquire()
-                        try:
+                        with state_lock:
                             last_unlock_ts = _now()
-                        finally:
-                            state_lock.release()
+                            state_version += 1
 
                     # prev_locked は「観測できた値」で更新する
                     if locked is not None:
@@ -313,34 +494,32 @@ def create_app(
                         # 観測できないときは前回値を保持
                         pass
 
-                    state_lock.acquire()
-                    try:
+                    with state_lock:
                         als = auto_lock_seconds
                         lu = last_unlock_ts
-                    finally:
-                        state_lock.release()
 
                     if als > 0 and locked is False and door_closed is True and lu is not None:
                         if (_now() - lu) >= als:
-                            # 施錠実行（サーボ制御は内部で排他）
-                            try:
-                                servo.lock()
-                            finally:
-                                # 直後に再連打しないよう、タイムスタンプを進めておく
-                                state_lock.acquire()
-                                try:
+                            # 施錠はHTTPからの操作と同じ受付を通す（操作中なら次の周期で再試行）
+                            if _submit("lock", "autolock") is not None:
+                                # 直後に再投入しないよう、タイムスタンプを進めておく
+                                with state_lock:
                                     last_unlock_ts = _now()
-                                finally:
-                                    state_lock.release()
+                                    state_version += 1
 
                 except Exception:
                     # センサーの一時エラー等で落ちないようにする
                     pass
-                time.sleep(0.5)
+                wake_event.wait(sensor_poll_interval_s)
+                wake_event.clear()
+            # 停止時に完了確認待ちが残っていれば、期限を待たずに確定させる
+            _resolve_pending(stopping=True)
 
         t = threading.Thread(target=_loop, name="smartlock-autolock", daemon=True)
         t.start()
 
+        atexit.register(handle.retire)
+
     _start_autolock_thread()
 
     return app
\ No newline at end of file